@@ -8,16 +8,27 @@ Features:
 """
 
 from flask import Flask, request, jsonify, send_from_directory, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from web3 import Web3
+from web3.logs import DISCARD
+from sqlalchemy import select, insert, bindparam
 from models import (
-    Voter, Admin, Election, VoteReceipt, 
-    VoterElectionRegistration, SessionLocal
+    Voter, VoterEmbedding, Admin, Election, VoteReceipt, 
+    VoterElectionRegistration, SessionLocal, bulk_register_voters
+)
+from face_utils import (
+    encode_face, compare_faces, hash_encoding, decode_embedding, encoding_to_bytes
 )
-from face_utils import encode_face, compare_faces, hash_encoding
 import numpy as np
-import os, json, base64, cv2, bcrypt, jwt, datetime, hashlib
-from functools import wraps
+import os, re, json, base64, cv2, bcrypt, jwt, datetime, hashlib, threading, time, asyncio, logging
+from functools import wraps, partial
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+import requests
+import orjson
+from requests.adapters import HTTPAdapter
 
 from config.secret import (
     JWT_SECRET,
@@ -26,25 +37,81 @@ from config.secret import (
     CONTRACT_ADDRESS,
     ABI_PATH,
     RPC_URL,
-    GEMINI_API_KEY
+    GEMINI_API_KEY,
+    BCRYPT_ROUNDS,
+    BCRYPT_ROUNDS_EXPLICIT
 )
 
 import google.generativeai as genai
+_GEMINI_MODEL = None
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
+    _GEMINI_MODEL = genai.GenerativeModel("gemini-1.5-flash")
+
+# Runtime diagnostics; DEBUG records are dropped cheaply at the default INFO level
+logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_PATH = os.path.join(BASE_DIR, "../frontend")
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify via orjson; falls back to Flask's default() for dates etc."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the Response (no str decode/re-encode)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(
+                obj,
+                default=self.default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE,
+            ),
+            mimetype=self.mimetype,
+        )
+
 
 app = Flask(__name__, static_folder=FRONTEND_PATH, static_url_path="")
+app.json = ORJSONProvider(app)
 CORS(app)
 
+# Shared pool for independent I/O-bound work (RPC calls, DB probes)
+EXECUTOR = ThreadPoolExecutor(max_workers=16)
+# Vote finalizers block in await_receipt for up to 120 s → own pool so a burst
+# of pending votes can't starve run_io reads on EXECUTOR
+FINALIZE_POOL = ThreadPoolExecutor(max_workers=16)
+# Per-call fallback for rejected batches; leaf tasks only, so batch_call can run
+# inside EXECUTOR tasks without waiting on its own saturated pool
+BATCH_FALLBACK_POOL = ThreadPoolExecutor(max_workers=8)
+# Gemini calls from the public chat endpoint; a few slow replies must not
+# tie up EXECUTOR threads that run_io reads depend on
+CHAT_POOL = ThreadPoolExecutor(max_workers=4)
+# CPU-bound face encodes for batch registration, kept off the I/O pool
+ENCODE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+# CPU-bound bcrypt checks; bcrypt releases the GIL so threads scale across cores
+BCRYPT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+
 # ============================================================
 #                    BLOCKCHAIN SETUP
 # ============================================================
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Shared keep-alive session so RPC calls (incl. from EXECUTOR threads) reuse sockets
+rpc_session = requests.Session()
+rpc_session.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0))
+rpc_session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0))
+
+w3 = Web3(Web3.HTTPProvider(RPC_URL, session=rpc_session, request_kwargs={"timeout": 30}))
+# Results are only read by key (receipt["status"]), so skip AttributeDict wrapping
+try:
+    w3.middleware_onion.remove("attrdict")
+except ValueError:
+    pass
 print("Blockchain Connected:", w3.is_connected())
 
 with open(ABI_PATH, "r", encoding="utf-8") as f:
@@ -56,6 +123,19 @@ contract = w3.eth.contract(
     abi=abi,
 )
 
+# Bound once so hot read paths skip the ABI lookup on contract.functions
+GET_ELECTION = contract.functions.getElection
+GET_CANDIDATE = contract.functions.getCandidate
+GET_ELECTION_COUNT = contract.functions.getElectionCount
+GET_ELECTION_PHASE = contract.functions.getElectionPhase
+# Aggregate view; absent from ABIs of contracts deployed before it existed
+GET_CANDIDATES = getattr(contract.functions, "getCandidates", None)
+GET_VOTE_RECEIPT = contract.functions.getVoteReceipt
+GLOBAL_RECEIPT_COUNTER = contract.functions.globalReceiptCounter
+VOTE = contract.functions.vote
+# Event ABI + topic resolved once instead of per processed vote receipt
+VOTE_CAST_EVENT = contract.events.VoteCast()
+
 # Phase mapping from contract enum to string
 PHASE_MAP = {0: "CREATED", 1: "ACTIVE", 2: "ENDED", 3: "RESULT_DECLARED"}
 PHASE_REVERSE = {"CREATED": 0, "ACTIVE": 1, "ENDED": 2, "RESULT_DECLARED": 3}
@@ -70,44 +150,74 @@ def get_bytes(val):
     return bytes(val) if val is not None else b""
 
 
-def save_image_b64(data_url, dest):
+# Half-resolution decode is only used when the result still has this many rows/cols
+MIN_REDUCED_SIDE = 240
+
+
+def decode_image_b64(data_url):
+    """Decode a base64 data URL straight into a BGR ndarray (no disk I/O)"""
     if "," in data_url:
         _, encoded = data_url.split(",", 1)
     else:
         encoded = data_url
     img_bytes = base64.b64decode(encoded)
     nparr = np.frombuffer(img_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    # libjpeg scales during the IDCT → 1/4 of the pixels for HOG + dlib to process
+    img = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_COLOR_2)
+    if img is None or min(img.shape[:2]) < MIN_REDUCED_SIDE:
+        # Small frames would leave too few pixels on the face → full resolution
+        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     if img is None:
         raise ValueError("Invalid Base64 image")
-    cv2.imwrite(dest, img)
     return img
 
 
-def safe_delete(path):
-    try:
-        if os.path.exists(path):
-            os.remove(path)
-    except:
-        pass
+def run_io(fn, *args):
+    """Await a blocking call (RPC / DB) on EXECUTOR from an async view"""
+    return asyncio.get_running_loop().run_in_executor(EXECUTOR, fn, *args)
 
 
-def send_contract_tx(fn, *args, gas=500000):
-    """Send transaction and return (tx_hash, receipt, error)"""
+def batch_call(calls):
+    """Run contract read calls in a single JSON-RPC batch and return decoded results"""
+    if not calls:
+        return []
     try:
-        nonce = w3.eth.get_transaction_count(ADMIN_ACCOUNT)
-        tx = fn(*args).build_transaction({
-            "from": ADMIN_ACCOUNT,
-            "nonce": nonce,
-            "gas": gas,
-            "gasPrice": w3.to_wei("1", "gwei"),
-        })
-        signed = w3.eth.account.sign_transaction(tx, private_key=ADMIN_PRIVATE_KEY)
-        raw_tx = signed.raw_transaction if hasattr(signed, 'raw_transaction') else signed.rawTransaction
-        tx_hash = w3.eth.send_raw_transaction(raw_tx)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-        return tx_hash.hex(), receipt, None
-    except ValueError as e:
+        with w3.batch_requests() as batch:
+            for call in calls:
+                batch.add(call)
+            return batch.execute()
+    except Exception:
+        # Node rejected the batch → fan the calls out concurrently instead
+        return list(BATCH_FALLBACK_POOL.map(lambda call: call.call(), calls))
+
+
+# In-process nonce counter so back-to-back admin txs can be pipelined
+_NONCE_LOCK = threading.Lock()
+_NEXT_NONCE = None
+
+
+def _next_nonce():
+    global _NEXT_NONCE
+    with _NONCE_LOCK:
+        if _NEXT_NONCE is None:
+            _NEXT_NONCE = w3.eth.get_transaction_count(ADMIN_ACCOUNT, "pending")
+        nonce = _NEXT_NONCE
+        _NEXT_NONCE += 1
+        return nonce
+
+
+def _reset_nonce():
+    global _NEXT_NONCE
+    with _NONCE_LOCK:
+        _NEXT_NONCE = None
+
+
+_REVERT_RE = re.compile(r"revert (.+?)(?:'|$)", re.IGNORECASE)
+
+
+def _tx_error(e):
+    """Extract a readable revert reason from a web3 exception"""
+    if isinstance(e, ValueError):
         err = e.args[0]
         reason = ""
         if isinstance(err, dict):
@@ -118,17 +228,217 @@ def send_contract_tx(fn, *args, gas=500000):
             reason = reason or err.get("message", "") or "Blockchain error"
         else:
             reason = str(err)
-        return None, None, reason or "Blockchain error"
+        return reason or "Blockchain error"
+    # Extract reason from web3 exception string if possible
+    err_str = str(e)
+    if "revert" in err_str.lower():
+        # Try to extract the revert reason
+        match = _REVERT_RE.search(err_str)
+        if match:
+            return match.group(1).strip()
+    return err_str
+
+
+# Fields shared by every admin transaction; copied per call, then nonce/gas added
+_TX_DEFAULTS = {
+    "from": ADMIN_ACCOUNT,
+    "gasPrice": w3.to_wei("1", "gwei"),
+}
+
+
+def submit_contract_tx(fn, *args, gas=500000):
+    """Sign and broadcast transaction without waiting for it to be mined → (tx_hash, error)"""
+    try:
+        tx_params = dict(_TX_DEFAULTS, nonce=_next_nonce(), gas=gas)
+        tx = fn(*args).build_transaction(tx_params)
+        signed = w3.eth.account.sign_transaction(tx, private_key=ADMIN_PRIVATE_KEY)
+        raw_tx = signed.raw_transaction if hasattr(signed, 'raw_transaction') else signed.rawTransaction
+        tx_hash = w3.eth.send_raw_transaction(raw_tx)
+        return tx_hash.hex(), None
+    except Exception as e:
+        # Nonce may not have been consumed → resync from the node next time
+        _reset_nonce()
+        return None, _tx_error(e)
+
+
+def await_receipt(tx_hash, timeout=60):
+    """Wait for a submitted transaction to be mined → (receipt, error)"""
+    try:
+        return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout), None
     except Exception as e:
-        # Extract reason from web3 exception string if possible
-        err_str = str(e)
-        if "revert" in err_str.lower():
-            # Try to extract the revert reason
-            import re
-            match = re.search(r"revert (.+?)(?:'|$)", err_str, re.IGNORECASE)
-            if match:
-                return None, None, match.group(1).strip()
-        return None, None, err_str
+        return None, _tx_error(e)
+
+
+def send_contract_tx(fn, *args, gas=500000):
+    """Send transaction and return (tx_hash, receipt, error)"""
+    tx_hash, err = submit_contract_tx(fn, *args, gas=gas)
+    if err:
+        return None, None, err
+    receipt, err = await_receipt(tx_hash)
+    if err:
+        return None, None, err
+    return tx_hash, receipt, None
+
+
+class ChainCache:
+    """Memoize contract reads until the chain advances to a new block"""
+
+    def __init__(self, refresh_interval=1.0):
+        self._lock = threading.Lock()
+        self._data = {}
+        self._block = None
+        self._checked_at = 0.0
+        self._refresh_interval = refresh_interval
+
+    def _sync_block(self):
+        now = time.monotonic()
+        if now - self._checked_at < self._refresh_interval:
+            return
+        block = w3.eth.block_number
+        with self._lock:
+            self._checked_at = now
+            if block != self._block:
+                self._block = block
+                self._data.clear()
+
+    def get(self, key, loader):
+        self._sync_block()
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+        value = loader()
+        with self._lock:
+            self._data[key] = value
+        return value
+
+    def invalidate(self, election_id=None):
+        """Drop entries for one election (plus aggregate keys), or everything"""
+        with self._lock:
+            if election_id is None:
+                self._data.clear()
+                return
+            for key in list(self._data):
+                if len(key) == 1 or key[1] == election_id:
+                    del self._data[key]
+
+
+chain_cache = ChainCache()
+
+
+# Election rows keyed by blockchain_id; popped on every write to that election
+_ELECTION_CACHE = {}
+
+
+def get_election_row(election_id, db=None):
+    """Cached Election row (detached) or None; pass db to reuse the caller's session"""
+    row = _ELECTION_CACHE.get(election_id)
+    if row is None:
+        if db is None:
+            with SessionLocal() as own_db:
+                row = own_db.query(Election).filter_by(blockchain_id=election_id).first()
+        else:
+            row = db.query(Election).filter_by(blockchain_id=election_id).first()
+            if row is not None:
+                # Detach so later commits on the caller's session don't expire it
+                db.expunge(row)
+        if row is not None:
+            _ELECTION_CACHE[election_id] = row
+    return row
+
+
+def get_db():
+    """Request-scoped session, opened lazily and closed in teardown_request"""
+    if "db" not in g:
+        g.db = SessionLocal()
+    return g.db
+
+
+@app.teardown_request
+def _close_db(exc):
+    db = g.pop("db", None)
+    if db is not None:
+        db.close()
+
+
+# election_id → (fetched_at, phase_int); popped on admin phase transitions
+_phase_cache = {}
+_phase_lock = threading.Lock()
+
+
+def get_phase_cached(election_id, ttl=2.0):
+    now = time.monotonic()
+    with _phase_lock:
+        hit = _phase_cache.get(election_id)
+    if hit and now - hit[0] < ttl:
+        return hit[1]
+    phase_int = GET_ELECTION_PHASE(election_id).call()
+    with _phase_lock:
+        _phase_cache[election_id] = (now, phase_int)
+    return phase_int
+
+
+def prime_vote_reads(election_id, ttl=2.0):
+    """When both the phase cache and the nonce counter are cold, fill them in one batch"""
+    global _NEXT_NONCE
+    now = time.monotonic()
+    with _phase_lock:
+        hit = _phase_cache.get(election_id)
+    if (hit and now - hit[0] < ttl) or _NEXT_NONCE is not None:
+        return
+    try:
+        with w3.batch_requests() as batch:
+            batch.add(GET_ELECTION_PHASE(election_id))
+            batch.add(w3.eth.get_transaction_count(ADMIN_ACCOUNT, "pending"))
+            phase_int, nonce = batch.execute()
+    except Exception:
+        # Provider rejected the batch → the serial reads will run as usual
+        return
+    with _phase_lock:
+        _phase_cache[election_id] = (now, phase_int)
+    with _NONCE_LOCK:
+        if _NEXT_NONCE is None:
+            _NEXT_NONCE = nonce
+
+
+# Hot lookups built once; SQLAlchemy reuses their compiled SQL from its statement cache
+VOTER_BY_ENROLLMENT = (
+    select(Voter.id, VoterEmbedding.emb)
+    .join(VoterEmbedding, VoterEmbedding.voter_id == Voter.id)
+    .where(Voter.enrollment == bindparam("enrollment"))
+    .limit(1)
+)
+RECEIPT_BY_ID = select(VoteReceipt).where(VoteReceipt.receipt_id == bindparam("receipt_id")).limit(1)
+RECEIPT_BY_HASH = select(VoteReceipt).where(VoteReceipt.enrollment_hash == bindparam("enrollment_hash")).limit(1)
+RECEIPT_BY_HASH_ELECTION = select(VoteReceipt).where(
+    VoteReceipt.enrollment_hash == bindparam("enrollment_hash"),
+    VoteReceipt.election_id == bindparam("election_id"),
+).limit(1)
+
+
+# enrollment → CachedVoter with the encoding already decoded from the BLOB
+CachedVoter = namedtuple("CachedVoter", ["id", "encoding"])
+_voter_cache = TTLCache(maxsize=10000, ttl=300)
+_voter_cache_lock = threading.Lock()
+
+
+def get_voter_cached(enrollment):
+    with _voter_cache_lock:
+        cached = _voter_cache.get(enrollment)
+    if cached is not None:
+        return cached
+    row = get_db().execute(VOTER_BY_ENROLLMENT, {"enrollment": enrollment}).first()
+    if not row:
+        return None
+    cached = CachedVoter(row.id, decode_embedding(get_bytes(row.emb)))
+    with _voter_cache_lock:
+        _voter_cache[enrollment] = cached
+    return cached
+
+
+def invalidate_voter(*enrollments):
+    with _voter_cache_lock:
+        for enrollment in enrollments:
+            _voter_cache.pop(enrollment, None)
 
 
 def generate_enrollment_hash(enrollment, election_id):
@@ -140,6 +450,11 @@ def generate_enrollment_hash(enrollment, election_id):
 # ============================================================
 #                    AUTH DECORATOR
 # ============================================================
+# Verified tokens → (admin, exp). Failed verifications are never cached.
+_JWT_CACHE = TTLCache(maxsize=2048, ttl=900)
+_JWT_LOCK = threading.Lock()
+
+
 def admin_required(f):
     @wraps(f)
     def wrap(*args, **kwargs):
@@ -148,13 +463,23 @@ def admin_required(f):
             return jsonify({"error": "Token missing"}), 401
         try:
             token = token.replace("Bearer ", "").strip()
-            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            username = payload.get("username")
-            with SessionLocal() as db:
-                admin = db.query(Admin).filter_by(username=username).first()
-                if not admin:
-                    return jsonify({"error": "Admin not found"}), 401
-                g.admin = admin
+            key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+            with _JWT_LOCK:
+                cached = _JWT_CACHE.get(key)
+            if cached and cached[1] > time.time():
+                g.admin = cached[0]
+            else:
+                payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+                username = payload.get("username")
+                with SessionLocal() as db:
+                    admin = db.query(Admin).filter_by(username=username).first()
+                    if not admin:
+                        return jsonify({"error": "Admin not found"}), 401
+                    g.admin = admin
+                exp = payload.get("exp")
+                if exp:
+                    with _JWT_LOCK:
+                        _JWT_CACHE[key] = (admin, exp)
         except jwt.ExpiredSignatureError:
             return jsonify({"error": "Token expired"}), 401
         except Exception as e:
@@ -214,63 +539,93 @@ def static_files(filename):
 # ============================================================
 #                    SYSTEM STATUS API
 # ============================================================
-@app.route("/api/status", methods=["GET"])
-def system_status():
-    """Real-time system health check for status widget"""
-    status = {
-        "blockchain": {"ok": False, "label": "Blockchain", "detail": ""},
-        "contract":   {"ok": False, "label": "Smart Contract", "detail": ""},
-        "database":   {"ok": False, "label": "Database", "detail": ""},
-        "server":     {"ok": True,  "label": "Flask Server", "detail": "Running"},
-    }
-
-    # ── 1. Blockchain (Ganache) ──────────────────────────────
+def _probe_blockchain():
     try:
         connected = w3.is_connected()
         if connected:
             block = w3.eth.block_number
             chain_id = w3.eth.chain_id
-            status["blockchain"] = {
+            return {
                 "ok": True,
                 "label": "Blockchain",
                 "detail": f"Block #{block} · Chain {chain_id}"
             }
-        else:
-            status["blockchain"]["detail"] = "Ganache not reachable"
+        return {"ok": False, "label": "Blockchain", "detail": "Ganache not reachable"}
     except Exception as e:
-        status["blockchain"]["detail"] = str(e)[:60]
+        return {"ok": False, "label": "Blockchain", "detail": str(e)[:60]}
+
+
+# Deployed bytecode only changes on redeploy: remember a positive get_code result,
+# retry a negative one at most once per minute, and forget it on any call error.
+_CONTRACT_PRESENT = None
+_CONTRACT_CHECKED_AT = 0.0
+_CONTRACT_RECHECK_SECONDS = 60
+
 
-    # ── 2. Smart Contract ────────────────────────────────────
+def _contract_present():
+    global _CONTRACT_PRESENT, _CONTRACT_CHECKED_AT
+    now = time.monotonic()
+    if _CONTRACT_PRESENT or (
+        _CONTRACT_PRESENT is not None and now - _CONTRACT_CHECKED_AT < _CONTRACT_RECHECK_SECONDS
+    ):
+        return _CONTRACT_PRESENT
+    code = w3.eth.get_code(Web3.to_checksum_address(CONTRACT_ADDRESS))
+    _CONTRACT_PRESENT = len(code) > 2
+    _CONTRACT_CHECKED_AT = now
+    return _CONTRACT_PRESENT
+
+
+def _probe_contract():
+    global _CONTRACT_PRESENT
     try:
-        code = w3.eth.get_code(Web3.to_checksum_address(CONTRACT_ADDRESS))
-        if len(code) > 2:
-            count = contract.functions.getElectionCount().call()
+        if _contract_present():
+            count = chain_cache.get(
+                ("getElectionCount",),
+                lambda: GET_ELECTION_COUNT().call()
+            )
             short_addr = CONTRACT_ADDRESS[:6] + "..." + CONTRACT_ADDRESS[-4:]
-            status["contract"] = {
+            return {
                 "ok": True,
                 "label": "Smart Contract",
                 "detail": f"{short_addr} · {count} election(s)"
             }
-        else:
-            status["contract"]["detail"] = "No contract at address"
+        return {"ok": False, "label": "Smart Contract", "detail": "No contract at address"}
     except Exception as e:
-        status["contract"]["detail"] = str(e)[:60]
+        _CONTRACT_PRESENT = None
+        return {"ok": False, "label": "Smart Contract", "detail": str(e)[:60]}
+
 
-    # ── 3. Database (MySQL) ──────────────────────────────────
+def _probe_database():
     try:
         with SessionLocal() as db:
             db.execute(__import__("sqlalchemy").text("SELECT 1"))
-        from models import Voter, Election
-        with SessionLocal() as db:
             voter_count    = db.query(Voter).count()
             election_count = db.query(Election).count()
-        status["database"] = {
+        return {
             "ok": True,
             "label": "Database",
             "detail": f"{voter_count} voters · {election_count} elections"
         }
     except Exception as e:
-        status["database"]["detail"] = str(e)[:60]
+        return {"ok": False, "label": "Database", "detail": str(e)[:60]}
+
+
+@app.route("/api/status", methods=["GET"])
+async def system_status():
+    """Real-time system health check for status widget"""
+    # Probes are independent → run them concurrently
+    blockchain, contract_probe, database = await asyncio.gather(
+        run_io(_probe_blockchain),
+        run_io(_probe_contract),
+        run_io(_probe_database),
+    )
+
+    status = {
+        "blockchain": blockchain,
+        "contract":   contract_probe,
+        "database":   database,
+        "server":     {"ok": True,  "label": "Flask Server", "detail": "Running"},
+    }
 
     overall_ok = all(v["ok"] for v in status.values())
 
@@ -285,19 +640,66 @@ def system_status():
 # ============================================================
 #                    ADMIN AUTH ROUTES
 # ============================================================
+# Recent bcrypt outcomes so retried/probed step1 posts don't re-run bcrypt
+_PASSWORD_CACHE = TTLCache(maxsize=1024, ttl=30)
+_PASSWORD_LOCK = threading.Lock()
+_PASSWORD_KEY = hashlib.sha256(JWT_SECRET.encode()).digest()
+
+
+def check_admin_password(admin, password):
+    key = hashlib.blake2b(
+        b"\0".join([admin.username.encode(), password.encode(), admin.password_hash.encode()]),
+        key=_PASSWORD_KEY,
+        digest_size=16,
+    ).digest()
+    with _PASSWORD_LOCK:
+        cached = _PASSWORD_CACHE.get(key)
+    if cached is not None:
+        return cached
+    ok = bcrypt.checkpw(password.encode(), admin.password_hash.encode())
+    with _PASSWORD_LOCK:
+        _PASSWORD_CACHE[key] = ok
+    return ok
+
+
+def bcrypt_rehash(password_hash, password):
+    """
+    New hash at BCRYPT_ROUNDS if the stored cost is lower, or differs and
+    BCRYPT_ROUNDS was set explicitly; else None
+    """
+    try:
+        rounds = int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+    if rounds == BCRYPT_ROUNDS or (rounds > BCRYPT_ROUNDS and not BCRYPT_ROUNDS_EXPLICIT):
+        return None
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+
 @app.route("/admin/login_step1", methods=["POST"])
-def admin_login_step1():
+async def admin_login_step1():
     data = request.get_json() or {}
     username = data.get("username")
     password = data.get("password")
 
-    with SessionLocal() as db:
-        admin = db.query(Admin).filter_by(username=username).first()
+    db = get_db()
+    admin = db.query(Admin).filter_by(username=username).first()
 
     if not admin:
         return jsonify({"error": "Invalid username"}), 401
-    if not bcrypt.checkpw(password.encode(), admin.password_hash.encode()):
+    ok = await asyncio.get_running_loop().run_in_executor(
+        BCRYPT_POOL, check_admin_password, admin, password or ""
+    )
+    if not ok:
         return jsonify({"error": "Wrong password"}), 401
+
+    # Lazily migrate legacy cost-12 hashes so later logins verify faster
+    new_hash = await asyncio.get_running_loop().run_in_executor(
+        BCRYPT_POOL, bcrypt_rehash, admin.password_hash, password
+    )
+    if new_hash:
+        admin.password_hash = new_hash
+        db.commit()
     return jsonify({"ok": True})
 
 
@@ -306,24 +708,19 @@ def admin_login_face():
     username = request.form.get("username")
     image_b64 = request.form.get("image")
 
-    with SessionLocal() as db:
-        admin = db.query(Admin).filter_by(username=username).first()
+    db = get_db()
+    admin = db.query(Admin).filter_by(username=username).first()
 
     if not admin:
         return jsonify({"error": "Unknown admin"}), 404
 
-    tmp_path = os.path.join(UPLOAD_FOLDER, f"admin_{username}.jpg")
-
     try:
-        img = save_image_b64(image_b64, tmp_path)
+        img = decode_image_b64(image_b64)
         known_bytes = get_bytes(admin.face_encoding)
 
-        if not compare_faces(known_bytes, img):
-            safe_delete(tmp_path)
+        if not compare_faces(known_bytes, encode_face(img)):
             return jsonify({"error": "Face mismatch"}), 401
 
-        safe_delete(tmp_path)
-
         token = jwt.encode(
             {
                 "username": username,
@@ -335,7 +732,6 @@ def admin_login_face():
         return jsonify({"ok": True, "token": token})
 
     except Exception as e:
-        safe_delete(tmp_path)
         return jsonify({"error": "Face login failed", "detail": str(e)}), 500
 
 
@@ -343,42 +739,56 @@ def admin_login_face():
 #                    ELECTION MANAGEMENT APIs
 # ============================================================
 
+def _load_chain_elections():
+    election_count = GET_ELECTION_COUNT().call()
+    return batch_call([
+        GET_ELECTION(i) for i in range(1, election_count + 1)
+    ])
+
+
+def _load_db_elections():
+    with SessionLocal() as db:
+        rows = {e.blockchain_id: e for e in db.query(Election).all()}
+    _ELECTION_CACHE.update(rows)
+    return rows
+
+
 @app.route("/api/elections", methods=["GET"])
-def list_elections():
+async def list_elections():
     """List all elections with their current phase"""
     try:
-        election_count = contract.functions.getElectionCount().call()
+        # DB read runs alongside the chain reads
+        results, db_elections = await asyncio.gather(
+            run_io(chain_cache.get, ("elections",), _load_chain_elections),
+            run_io(_load_db_elections),
+        )
         elections = []
-        
-        with SessionLocal() as db:
-            db_elections = {e.blockchain_id: e for e in db.query(Election).all()}
+
+        for i, data in enumerate(results, start=1):
+            phase = PHASE_MAP.get(data[3], "UNKNOWN")
+            db_el = db_elections.get(i)
+            is_live = db_el.is_live_results if db_el else True
             
-            for i in range(1, election_count + 1):
-                data = contract.functions.getElection(i).call()
-                phase = PHASE_MAP.get(data[3], "UNKNOWN")
-                db_el = db_elections.get(i)
-                is_live = db_el.is_live_results if db_el else True
-                
-                exp_dt = db_el.expires_at if db_el else None
-                exp_str = exp_dt.isoformat() if exp_dt else None
-                
-                if phase == "ACTIVE" and exp_dt and datetime.datetime.utcnow() > exp_dt:
-                    phase = "EXPIRED"
-                
-                elections.append({
-                    "id": data[0],
-                    "name": data[1],
-                    "description": data[2],
-                    "phase": phase,
-                    "candidateCount": data[4],
-                    "totalVotes": data[5],
-                    "createdAt": data[6],
-                    "startedAt": data[7],
-                    "endedAt": data[8],
-                    "is_live_results": is_live,
-                    "expires_at": exp_str
-                })
-        
+            exp_dt = db_el.expires_at if db_el else None
+            exp_str = exp_dt.isoformat() if exp_dt else None
+            
+            if phase == "ACTIVE" and exp_dt and datetime.datetime.utcnow() > exp_dt:
+                phase = "EXPIRED"
+            
+            elections.append({
+                "id": data[0],
+                "name": data[1],
+                "description": data[2],
+                "phase": phase,
+                "candidateCount": data[4],
+                "totalVotes": data[5],
+                "createdAt": data[6],
+                "startedAt": data[7],
+                "endedAt": data[8],
+                "is_live_results": is_live,
+                "expires_at": exp_str
+            })
+
         return jsonify(elections)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -414,21 +824,24 @@ def create_election():
     if err:
         return jsonify({"error": err}), 500
 
+    chain_cache.invalidate()
+
     # Get the new election ID from logs or count
-    election_count = contract.functions.getElectionCount().call()
+    election_count = GET_ELECTION_COUNT().call()
 
     # Cache in local DB
-    with SessionLocal() as db:
-        election = Election(
-            blockchain_id=election_count,
-            name=name,
-            description=description,
-            phase="CREATED",
-            is_live_results=is_live_results,
-            expires_at=expires_at_dt
-        )
-        db.add(election)
-        db.commit()
+    db = get_db()
+    election = Election(
+        blockchain_id=election_count,
+        name=name,
+        description=description,
+        phase="CREATED",
+        is_live_results=is_live_results,
+        expires_at=expires_at_dt
+    )
+    db.add(election)
+    db.commit()
+    _ELECTION_CACHE.pop(election_count, None)
 
     return jsonify({
         "ok": True,
@@ -441,16 +854,18 @@ def create_election():
 def get_election(election_id):
     """Get election details"""
     try:
-        data = contract.functions.getElection(election_id).call()
+        data = chain_cache.get(
+            ("getElection", election_id),
+            lambda: GET_ELECTION(election_id).call()
+        )
         phase = PHASE_MAP.get(data[3], "UNKNOWN")
         
         is_live = True
         exp_dt = None
-        with SessionLocal() as db:
-            db_el = db.query(Election).filter_by(blockchain_id=election_id).first()
-            if db_el:
-                is_live = db_el.is_live_results
-                exp_dt = db_el.expires_at
+        db_el = get_election_row(election_id)
+        if db_el:
+            is_live = db_el.is_live_results
+            exp_dt = db_el.expires_at
                 
         if phase == "ACTIVE" and exp_dt and datetime.datetime.utcnow() > exp_dt:
             phase = "EXPIRED"
@@ -485,13 +900,18 @@ def start_election(election_id):
     if err:
         return jsonify({"error": err}), 500
 
+    chain_cache.invalidate(election_id)
+
     # Update local cache
-    with SessionLocal() as db:
-        election = db.query(Election).filter_by(blockchain_id=election_id).first()
-        if election:
-            election.phase = "ACTIVE"
-            election.started_at = datetime.datetime.utcnow()
-            db.commit()
+    db = get_db()
+    election = db.query(Election).filter_by(blockchain_id=election_id).first()
+    if election:
+        election.phase = "ACTIVE"
+        election.started_at = datetime.datetime.utcnow()
+        db.commit()
+    _ELECTION_CACHE.pop(election_id, None)
+    with _phase_lock:
+        _phase_cache.pop(election_id, None)
 
     return jsonify({"ok": True, "tx": tx_hash, "phase": "ACTIVE"})
 
@@ -509,12 +929,17 @@ def end_election(election_id):
     if err:
         return jsonify({"error": err}), 500
 
-    with SessionLocal() as db:
-        election = db.query(Election).filter_by(blockchain_id=election_id).first()
-        if election:
-            election.phase = "ENDED"
-            election.ended_at = datetime.datetime.utcnow()
-            db.commit()
+    chain_cache.invalidate(election_id)
+
+    db = get_db()
+    election = db.query(Election).filter_by(blockchain_id=election_id).first()
+    if election:
+        election.phase = "ENDED"
+        election.ended_at = datetime.datetime.utcnow()
+        db.commit()
+    _ELECTION_CACHE.pop(election_id, None)
+    with _phase_lock:
+        _phase_cache.pop(election_id, None)
 
     return jsonify({"ok": True, "tx": tx_hash, "phase": "ENDED"})
 
@@ -532,11 +957,16 @@ def declare_results(election_id):
     if err:
         return jsonify({"error": err}), 500
 
-    with SessionLocal() as db:
-        election = db.query(Election).filter_by(blockchain_id=election_id).first()
-        if election:
-            election.phase = "RESULT_DECLARED"
-            db.commit()
+    chain_cache.invalidate(election_id)
+
+    db = get_db()
+    election = db.query(Election).filter_by(blockchain_id=election_id).first()
+    if election:
+        election.phase = "RESULT_DECLARED"
+        db.commit()
+    _ELECTION_CACHE.pop(election_id, None)
+    with _phase_lock:
+        _phase_cache.pop(election_id, None)
 
     return jsonify({"ok": True, "tx": tx_hash, "phase": "RESULT_DECLARED"})
 
@@ -545,7 +975,7 @@ def declare_results(election_id):
 def get_election_phase(election_id):
     """Get current phase of an election"""
     try:
-        phase_int = contract.functions.getElectionPhase(election_id).call()
+        phase_int = get_phase_cached(election_id)
         phase = PHASE_MAP.get(phase_int, "UNKNOWN")
         return jsonify({"election_id": election_id, "phase": phase})
     except Exception as e:
@@ -556,25 +986,45 @@ def get_election_phase(election_id):
 #                    CANDIDATE APIs
 # ============================================================
 
+def _load_candidates(election_id, candidate_count):
+    """All (id, name, votes) tuples for an election in one RPC when possible"""
+    if GET_CANDIDATES is not None:
+        try:
+            ids, names, votes = GET_CANDIDATES(election_id).call()
+            return list(zip(ids, names, votes))
+        except Exception:
+            # Older deployment without getCandidates → per-candidate batch
+            pass
+    return batch_call([
+        GET_CANDIDATE(election_id, i) for i in range(1, candidate_count + 1)
+    ])
+
+
 @app.route("/api/elections/<int:election_id>/candidates", methods=["GET"])
 def list_candidates(election_id):
     """List all candidates for an election"""
     try:
-        data = contract.functions.getElection(election_id).call()
+        data = chain_cache.get(
+            ("getElection", election_id),
+            lambda: GET_ELECTION(election_id).call()
+        )
         candidate_count = data[4]
         phase = PHASE_MAP.get(data[3], "UNKNOWN")
         
         is_live = True
-        with SessionLocal() as db:
-            db_el = db.query(Election).filter_by(blockchain_id=election_id).first()
-            if db_el:
-                is_live = db_el.is_live_results
+        db_el = get_election_row(election_id)
+        if db_el:
+            is_live = db_el.is_live_results
                 
         hide_results = (not is_live) and (phase != "RESULT_DECLARED")
         
+        results = chain_cache.get(
+            ("candidates", election_id),
+            lambda: _load_candidates(election_id, candidate_count)
+        )
+
         candidates = []
-        for i in range(1, candidate_count + 1):
-            cid, name, votes = contract.functions.getCandidate(election_id, i).call()
+        for cid, name, votes in results:
             if hide_results:
                 votes = 0
             candidates.append({"id": cid, "name": name, "votes": votes})
@@ -604,9 +1054,34 @@ def add_candidate(election_id):
     if err:
         return jsonify({"error": err}), 500
 
+    chain_cache.invalidate(election_id)
+
     return jsonify({"ok": True, "tx": tx_hash})
 
 
+@app.route("/api/elections/<int:election_id>/candidates/batch", methods=["POST"])
+@admin_required
+def add_candidates_batch(election_id):
+    """Add several candidates to an election in a single transaction"""
+    data = request.get_json() or {}
+    names = [n.strip() for n in data.get("names", []) if isinstance(n, str) and n.strip()]
+
+    if not names:
+        return jsonify({"error": "Candidate names required"}), 400
+
+    tx_hash, err = submit_contract_tx(
+        contract.functions.addCandidates,
+        election_id,
+        names,
+        gas=150000 + 100000 * len(names)
+    )
+
+    if err:
+        return jsonify({"error": err}), 500
+
+    return jsonify({"ok": True, "tx": tx_hash, "count": len(names), "status": "pending"})
+
+
 # Legacy endpoint for backward compatibility
 @app.route("/admin/add_candidate", methods=["POST"])
 @admin_required
@@ -628,6 +1103,8 @@ def add_candidate_legacy():
     if err:
         return jsonify({"error": err}), 500
 
+    chain_cache.invalidate(election_id)
+
     return jsonify({"ok": True, "tx": tx_hash})
 
 
@@ -637,21 +1114,27 @@ def candidates_list_legacy():
     """Legacy endpoint - defaults to election 1"""
     election_id = request.args.get("election_id", 1, type=int)
     try:
-        data = contract.functions.getElection(election_id).call()
+        data = chain_cache.get(
+            ("getElection", election_id),
+            lambda: GET_ELECTION(election_id).call()
+        )
         candidate_count = data[4]
         phase = PHASE_MAP.get(data[3], "UNKNOWN")
 
         is_live = True
-        with SessionLocal() as db:
-            db_el = db.query(Election).filter_by(blockchain_id=election_id).first()
-            if db_el:
-                is_live = db_el.is_live_results
+        db_el = get_election_row(election_id)
+        if db_el:
+            is_live = db_el.is_live_results
                 
         hide_results = (not is_live) and (phase != "RESULT_DECLARED")
         
+        results = chain_cache.get(
+            ("candidates", election_id),
+            lambda: _load_candidates(election_id, candidate_count)
+        )
+
         candidates = []
-        for i in range(1, candidate_count + 1):
-            cid, name, votes = contract.functions.getCandidate(election_id, i).call()
+        for cid, name, votes in results:
             if hide_results:
                 votes = 0
             candidates.append({"id": cid, "name": name, "votes": votes})
@@ -661,6 +1144,40 @@ def candidates_list_legacy():
         return jsonify({"error": str(e)}), 500
 
 
+# ============================================================
+#                    TRANSACTION STATUS API
+# ============================================================
+
+@app.route("/api/tx/<tx_hash>", methods=["GET"])
+def tx_status(tx_hash):
+    """Poll a submitted transaction: pending / success / failed"""
+    try:
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+    except Exception:
+        # Not mined yet (TransactionNotFound) or unknown hash
+        return jsonify({"tx": tx_hash, "status": "pending"})
+
+    out = {
+        "tx": tx_hash,
+        "status": "success" if receipt["status"] == 1 else "failed",
+        "block_number": receipt["blockNumber"],
+        "gas_used": receipt["gasUsed"],
+    }
+
+    # Votes: expose the receipt once the background finalizer has stored it
+    vote_receipt = get_db().query(VoteReceipt).filter_by(tx_hash=tx_hash).first()
+    if vote_receipt:
+        out["receipt_id"] = vote_receipt.receipt_id
+        out["visible_tag"] = vote_receipt.visible_tag
+    else:
+        with _finalize_errors_lock:
+            receipt_error = _finalize_errors.get(tx_hash)
+        if receipt_error:
+            out["receipt_error"] = receipt_error
+
+    return jsonify(out)
+
+
 # ============================================================
 #                    VOTER REGISTRATION APIs
 # ============================================================
@@ -668,12 +1185,12 @@ def candidates_list_legacy():
 @app.route("/admin/voters", methods=["GET"])
 @admin_required
 def voters_list():
-    with SessionLocal() as db:
-        voters = db.query(Voter).all()
-        out = [
-            {"id": v.id, "enrollment": v.enrollment, "name": v.name} 
-            for v in voters
-        ]
+    db = get_db()
+    voters = db.query(Voter).all()
+    out = [
+        {"id": v.id, "enrollment": v.enrollment, "name": v.name} 
+        for v in voters
+    ]
     return jsonify(out)
 
 
@@ -688,58 +1205,145 @@ def register_voter_for_election(election_id):
     if not enrollment or not name or not image_b64:
         return jsonify({"error": "All fields required"}), 400
 
-    img_path = os.path.join(UPLOAD_FOLDER, f"temp_{enrollment}.jpg")
+    db = get_db()
+    # Check if voter exists
+    voter = db.query(Voter).filter_by(enrollment=enrollment).first()
+    
+    try:
+        img = decode_image_b64(image_b64)
+        new_enc = encode_face(img)
+
+        face_hash = hash_encoding(new_enc)
+        face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
+
+        # Register on blockchain for this election
+        tx_hash, receipt, err = send_contract_tx(
+            contract.functions.registerVoter,
+            election_id,
+            enrollment,
+            face_hash_bytes32
+        )
 
-    with SessionLocal() as db:
-        # Check if voter exists
-        voter = db.query(Voter).filter_by(enrollment=enrollment).first()
-        
-        try:
-            img = save_image_b64(image_b64, img_path)
-            new_enc = encode_face(img)
-
-            face_hash = hash_encoding(new_enc)
-            face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
-
-            # Register on blockchain for this election
-            tx_hash, receipt, err = send_contract_tx(
-                contract.functions.registerVoter,
-                election_id,
-                enrollment,
-                face_hash_bytes32
-            )
+        if err:
+            return jsonify({"error": err}), 500
 
-            if err:
-                safe_delete(img_path)
-                return jsonify({"error": err}), 500
-
-            # Create voter if doesn't exist
-            if not voter:
-                voter = Voter(
-                    enrollment=enrollment,
-                    name=name,
-                    face_encoding=new_enc.tobytes(),
-                )
-                db.add(voter)
-                db.flush()
-
-            # Track registration
-            registration = VoterElectionRegistration(
-                voter_id=voter.id,
-                election_id=election_id,
-                enrollment=enrollment,
-                face_hash=face_hash,
-            )
-            db.add(registration)
-            db.commit()
+        # Create voter if doesn't exist
+        if not voter:
+            voter = Voter(enrollment=enrollment, name=name)
+            db.add(voter)
+            db.flush()
+            db.add(VoterEmbedding(voter_id=voter.id, emb=encoding_to_bytes(new_enc)))
+
+        # Track registration
+        registration = VoterElectionRegistration(
+            voter_id=voter.id,
+            election_id=election_id,
+            enrollment=enrollment,
+            face_hash=face_hash,
+        )
+        db.add(registration)
+        db.commit()
+        invalidate_voter(enrollment)
 
-            safe_delete(img_path)
-            return jsonify({"ok": True, "tx": tx_hash})
+        return jsonify({"ok": True, "tx": tx_hash})
 
-        except Exception as e:
-            db.rollback()
-            safe_delete(img_path)
-            return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        db.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+# registerVoters gas is 500k + 200k per voter → 25 stays under Ganache's ~6.7M block limit
+MAX_BATCH_VOTERS = 25
+
+
+def _encode_voter_image(image_b64):
+    new_enc = encode_face(decode_image_b64(image_b64))
+    return new_enc, hash_encoding(new_enc)
+
+
+@app.route("/api/elections/<int:election_id>/register_voters_batch", methods=["POST"])
+@admin_required
+def register_voters_batch(election_id):
+    """Register many voters for an election with a single blockchain transaction"""
+    data = request.get_json() or []
+    if isinstance(data, dict):
+        data = data.get("voters", [])
+
+    if not data or not isinstance(data, list):
+        return jsonify({"error": "Voter list required"}), 400
+    if len(data) > MAX_BATCH_VOTERS:
+        return jsonify({"error": f"At most {MAX_BATCH_VOTERS} voters per batch"}), 400
+
+    entries = []
+    for idx, item in enumerate(data):
+        if item is not None and not isinstance(item, dict):
+            return jsonify({"error": f"Invalid voter entry {idx}"}), 400
+        enrollment = (item or {}).get("enrollment")
+        name = (item or {}).get("name")
+        image_b64 = (item or {}).get("image_b64") or (item or {}).get("image")
+        if not enrollment or not name or not image_b64:
+            return jsonify({"error": f"All fields required (entry {idx})"}), 400
+        entries.append((enrollment, name, image_b64))
+
+    enrollments = [e[0] for e in entries]
+    if len(set(enrollments)) != len(enrollments):
+        return jsonify({"error": "Duplicate enrollment in batch"}), 400
+
+    # Face encoding is independent per voter → fan out over the encode pool
+    try:
+        encoded = list(ENCODE_POOL.map(_encode_voter_image, [e[2] for e in entries]))
+    except Exception as e:
+        return jsonify({"error": "Face encoding failed", "detail": str(e)}), 400
+
+    face_hashes = [face_hash for _, face_hash in encoded]
+    if len(set(face_hashes)) != len(face_hashes):
+        return jsonify({"error": "Duplicate face in batch"}), 400
+
+    db = get_db()
+    existing = dict(db.execute(
+        select(Voter.enrollment, Voter.id).where(Voter.enrollment.in_(enrollments))
+    ).all())
+
+    tx_hash, receipt, err = send_contract_tx(
+        contract.functions.registerVoters,
+        election_id,
+        enrollments,
+        [Web3.to_bytes(hexstr=h) for h in face_hashes],
+        gas=500000 + 200000 * len(entries)
+    )
+
+    if err:
+        return jsonify({"error": err}), 500
+
+    try:
+        new_rows = []
+        for (enrollment, name, _), (new_enc, _) in zip(entries, encoded):
+            if enrollment not in existing:
+                new_rows.append({
+                    "enrollment": enrollment,
+                    "name": name,
+                    "face_encoding": encoding_to_bytes(new_enc),
+                })
+        new_ids = bulk_register_voters(db, new_rows)
+        existing.update(new_ids)
+
+        # Registrations' ids are never read back → plain executemany, no ORM flush
+        db.execute(insert(VoterElectionRegistration), [
+            {
+                "voter_id": existing[enrollment],
+                "election_id": election_id,
+                "enrollment": enrollment,
+                "face_hash": face_hash,
+            }
+            for enrollment, face_hash in zip(enrollments, face_hashes)
+        ])
+        db.commit()
+        invalidate_voter(*enrollments)
+    except Exception as e:
+        db.rollback()
+        return jsonify({"error": str(e), "tx": tx_hash}), 500
+
+    return jsonify({"ok": True, "tx": tx_hash, "count": len(entries)})
 
 
 # Legacy endpoint
@@ -754,51 +1358,96 @@ def register_voter_camera():
     if not enrollment or not name or not image_b64:
         return jsonify({"error": "All fields required"}), 400
 
-    img_path = os.path.join(UPLOAD_FOLDER, f"temp_{enrollment}.jpg")
+    db = get_db()
+    if db.query(Voter).filter_by(enrollment=enrollment).first():
+        return jsonify({"error": "Enrollment already registered"}), 409
 
-    with SessionLocal() as db:
-        if db.query(Voter).filter_by(enrollment=enrollment).first():
-            return jsonify({"error": "Enrollment already registered"}), 409
-
-        try:
-            img = save_image_b64(image_b64, img_path)
-            new_enc = encode_face(img)
+    try:
+        img = decode_image_b64(image_b64)
+        new_enc = encode_face(img)
 
-            face_hash = hash_encoding(new_enc)
-            face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
+        face_hash = hash_encoding(new_enc)
+        face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
 
-            tx_hash, receipt, err = send_contract_tx(
-                contract.functions.registerVoter,
-                election_id,
-                enrollment,
-                face_hash_bytes32
-            )
+        tx_hash, receipt, err = send_contract_tx(
+            contract.functions.registerVoter,
+            election_id,
+            enrollment,
+            face_hash_bytes32
+        )
 
-            if err:
-                safe_delete(img_path)
-                return jsonify({"error": err}), 500
+        if err:
+            return jsonify({"error": err}), 500
 
-            voter = Voter(
-                enrollment=enrollment,
-                name=name,
-                face_encoding=new_enc.tobytes(),
-            )
-            db.add(voter)
-            db.commit()
+        voter = Voter(enrollment=enrollment, name=name)
+        db.add(voter)
+        db.flush()
+        db.add(VoterEmbedding(voter_id=voter.id, emb=encoding_to_bytes(new_enc)))
+        db.commit()
+        invalidate_voter(enrollment)
 
-            safe_delete(img_path)
-            return jsonify({"ok": True, "tx": tx_hash})
+        return jsonify({"ok": True, "tx": tx_hash})
 
-        except Exception as e:
-            db.rollback()
-            safe_delete(img_path)
-            return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        db.rollback()
+        return jsonify({"error": str(e)}), 500
 
 
 # ============================================================
 #                    VOTING APIs
 # ============================================================
 
+def _vote_receipt_id(receipt, tx_hash):
+    """receiptId from the tx's own VoteCast log; counter RPC only if the log is missing"""
+    # DISCARD: logs from other events/contracts are skipped instead of raising
+    events = VOTE_CAST_EVENT.process_receipt(receipt, errors=DISCARD)
+    try:
+        return events[0]["args"]["receiptId"]
+    except (IndexError, KeyError):
+        logger.warning("No VoteCast log in tx %s; falling back to globalReceiptCounter", tx_hash)
+        return GLOBAL_RECEIPT_COUNTER().call()
+
+
+# tx hash → why the finalizer stored no VoteReceipt, reported by tx_status
+_finalize_errors = TTLCache(maxsize=10000, ttl=3600)
+_finalize_errors_lock = threading.Lock()
+
+
+def _record_finalize_error(tx_hash, message):
+    with _finalize_errors_lock:
+        _finalize_errors[tx_hash] = message
+
+
+def _finalize_vote(tx_hash, election_id, enrollment_hash):
+    """Background: wait for the vote tx, then store its receipt (no candidate info!)"""
+    receipt, err = await_receipt(tx_hash, timeout=120)
+    if err or receipt["status"] != 1:
+        logger.warning("Vote tx %s not confirmed: %s", tx_hash, err or "reverted")
+        if err:
+            # May still be mined later → tx_status reports success without a receipt
+            _record_finalize_error(tx_hash, f"Receipt not stored: {err}")
+        return
+
+    chain_cache.invalidate(election_id)
+    receipt_id = _vote_receipt_id(receipt, tx_hash)
+
+    with SessionLocal() as db:
+        try:
+            db.add(VoteReceipt(
+                receipt_id=receipt_id,
+                election_id=election_id,
+                enrollment_hash=enrollment_hash,
+                visible_tag=enrollment_hash[:10],
+                tx_hash=tx_hash,
+                block_number=receipt['blockNumber'],
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Could not store receipt for %s: %s", tx_hash, e)
+            _record_finalize_error(tx_hash, "Vote was recorded on-chain but its receipt could not be stored")
+
+
 @app.route("/api/elections/<int:election_id>/vote", methods=["POST"])
 def vote_v2(election_id):
     """Cast vote with receipt generation"""
@@ -810,14 +1459,15 @@ def vote_v2(election_id):
         return jsonify({"error": "All fields required"}), 400
 
     # Check election phase
+    prime_vote_reads(election_id)
     try:
-        phase_int = contract.functions.getElectionPhase(election_id).call()
+        phase_int = get_phase_cached(election_id)
         phase = PHASE_MAP.get(phase_int, "UNKNOWN")
         
-        with SessionLocal() as db:
-            db_el = db.query(Election).filter_by(blockchain_id=election_id).first()
-            if db_el and db_el.expires_at and datetime.datetime.utcnow() > db_el.expires_at and phase == "ACTIVE":
-                phase = "EXPIRED"
+        # Election + voter cache misses share the one request-scoped session
+        db_el = get_election_row(election_id, db=get_db())
+        if db_el and db_el.expires_at and datetime.datetime.utcnow() > db_el.expires_at and phase == "ACTIVE":
+            phase = "EXPIRED"
 
         if phase != "ACTIVE":
             return jsonify({
@@ -826,77 +1476,52 @@ def vote_v2(election_id):
     except Exception as e:
         return jsonify({"error": f"Failed to check election phase: {e}"}), 500
 
-    tmp_path = os.path.join(UPLOAD_FOLDER, f"{enrollment}_vote.jpg")
+    voter = get_voter_cached(enrollment)
+    if not voter:
+        return jsonify({"error": "Voter not found"}), 404
 
-    with SessionLocal() as db:
-        voter = db.query(Voter).filter_by(enrollment=enrollment).first()
-        if not voter:
-            return jsonify({"error": "Voter not found"}), 404
+    try:
+        img = decode_image_b64(image_b64)
+
+        # Face verify; the same probe encoding is hashed below
+        new_enc = encode_face(img)
+        if not compare_faces(voter.encoding, new_enc):
+            return jsonify({"error": "Face mismatch"}), 401
+
+        face_hash = hash_encoding(new_enc)
+        face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
+        vote_args = (election_id, enrollment, face_hash_bytes32, int(candidate_id))
 
+        # Dry-run first so reverts (already voted, bad candidate) still surface synchronously
         try:
-            img = save_image_b64(image_b64, tmp_path)
-
-            # Face verify
-            if not compare_faces(get_bytes(voter.face_encoding), img):
-                safe_delete(tmp_path)
-                return jsonify({"error": "Face mismatch"}), 401
-
-            new_enc = encode_face(img)
-            face_hash = hash_encoding(new_enc)
-            face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
-
-            tx_hash, receipt, err = send_contract_tx(
-                contract.functions.vote,
-                election_id,
-                enrollment,
-                face_hash_bytes32,
-                int(candidate_id),
-                gas=500000
-            )
+            VOTE(*vote_args).call({"from": ADMIN_ACCOUNT})
+        except Exception as e:
+            err = _tx_error(e)
+            if "already voted" in err.lower():
+                return jsonify({"error": "You already voted"}), 400
+            return jsonify({"error": err}), 500
 
-            safe_delete(tmp_path)
+        tx_hash, err = submit_contract_tx(VOTE, *vote_args, gas=500000)
 
-            if err:
-                if "already voted" in err.lower():
-                    return jsonify({"error": "You already voted"}), 400
-                return jsonify({"error": err}), 500
+        if err:
+            if "already voted" in err.lower():
+                return jsonify({"error": "You already voted"}), 400
+            return jsonify({"error": err}), 500
 
-            # Extract receipt ID from logs
-            receipt_id = None
-            enrollment_hash = generate_enrollment_hash(enrollment, election_id)
-            
-            # Parse VoteCast event
-            try:
-                vote_cast_event = contract.events.VoteCast().process_receipt(receipt)
-                if vote_cast_event:
-                    receipt_id = vote_cast_event[0]['args']['receiptId']
-            except:
-                # Fallback: get from contract
-                receipt_id = contract.functions.globalReceiptCounter().call()
-
-            # Store receipt locally (no candidate info!)
-            vote_receipt = VoteReceipt(
-                receipt_id=receipt_id,
-                election_id=election_id,
-                enrollment_hash=enrollment_hash,
-                visible_tag=enrollment_hash[:10],
-                tx_hash=tx_hash,
-                block_number=receipt['blockNumber'],
-            )
-            db.add(vote_receipt)
-            db.commit()
+        enrollment_hash = generate_enrollment_hash(enrollment, election_id)
 
-            return jsonify({
-                "ok": True,
-                "tx": tx_hash,
-                "receipt_id": receipt_id,
-                "block_number": receipt['blockNumber'],
-                "visible_tag": enrollment_hash[:10]
-            })
+        # Receipt wait + local VoteReceipt insert happen off the request thread
+        FINALIZE_POOL.submit(_finalize_vote, tx_hash, election_id, enrollment_hash)
 
-        except Exception as e:
-            safe_delete(tmp_path)
-            return jsonify({"error": "Vote failed", "detail": str(e)}), 500
+        return jsonify({
+            "ok": True,
+            "tx": tx_hash,
+            "status": "pending",
+            "visible_tag": enrollment_hash[:10]
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Vote failed", "detail": str(e)}), 500
 
 
 # Legacy vote endpoint
@@ -911,8 +1536,9 @@ def vote_legacy():
         return jsonify({"error": "All fields required"}), 400
 
     # Check election phase
+    prime_vote_reads(election_id)
     try:
-        phase_int = contract.functions.getElectionPhase(election_id).call()
+        phase_int = get_phase_cached(election_id)
         phase = PHASE_MAP.get(phase_int, "UNKNOWN")
         if phase != "ACTIVE":
             return jsonify({
@@ -921,65 +1547,59 @@ def vote_legacy():
     except Exception as e:
         return jsonify({"error": f"Failed to check election phase: {e}"}), 500
 
-    tmp_path = os.path.join(UPLOAD_FOLDER, f"{enrollment}_vote.jpg")
+    db = get_db()
+    voter = get_voter_cached(enrollment)
+    if not voter:
+        return jsonify({"error": "Voter not found"}), 404
 
-    with SessionLocal() as db:
-        voter = db.query(Voter).filter_by(enrollment=enrollment).first()
-        if not voter:
-            return jsonify({"error": "Voter not found"}), 404
+    try:
+        img = decode_image_b64(image_b64)
 
-        try:
-            img = save_image_b64(image_b64, tmp_path)
-
-            if not compare_faces(get_bytes(voter.face_encoding), img):
-                safe_delete(tmp_path)
-                return jsonify({"error": "Face mismatch"}), 401
-
-            new_enc = encode_face(img)
-            face_hash = hash_encoding(new_enc)
-            face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
-
-            tx_hash, receipt, err = send_contract_tx(
-                contract.functions.vote,
-                election_id,
-                enrollment,
-                face_hash_bytes32,
-                int(candidate_id),
-                gas=500000
-            )
+        new_enc = encode_face(img)
+        if not compare_faces(voter.encoding, new_enc):
+            return jsonify({"error": "Face mismatch"}), 401
 
-            safe_delete(tmp_path)
+        face_hash = hash_encoding(new_enc)
+        face_hash_bytes32 = Web3.to_bytes(hexstr=face_hash)
 
-            if err:
-                if "already voted" in err.lower():
-                    return jsonify({"error": "You already voted"}), 400
-                return jsonify({"error": err}), 500
+        tx_hash, receipt, err = send_contract_tx(
+            VOTE,
+            election_id,
+            enrollment,
+            face_hash_bytes32,
+            int(candidate_id),
+            gas=500000
+        )
 
-            # Generate receipt
-            receipt_id = contract.functions.globalReceiptCounter().call()
-            enrollment_hash = generate_enrollment_hash(enrollment, election_id)
+        if err:
+            if "already voted" in err.lower():
+                return jsonify({"error": "You already voted"}), 400
+            return jsonify({"error": err}), 500
 
-            vote_receipt = VoteReceipt(
-                receipt_id=receipt_id,
-                election_id=election_id,
-                enrollment_hash=enrollment_hash,
-                visible_tag=enrollment_hash[:10],
-                tx_hash=tx_hash,
-                block_number=receipt['blockNumber'],
-            )
-            db.add(vote_receipt)
-            db.commit()
+        # Generate receipt
+        receipt_id = _vote_receipt_id(receipt, tx_hash)
+        enrollment_hash = generate_enrollment_hash(enrollment, election_id)
 
-            return jsonify({
-                "ok": True,
-                "tx": tx_hash,
-                "receipt_id": receipt_id,
-                "block_number": receipt['blockNumber']
-            })
+        vote_receipt = VoteReceipt(
+            receipt_id=receipt_id,
+            election_id=election_id,
+            enrollment_hash=enrollment_hash,
+            visible_tag=enrollment_hash[:10],
+            tx_hash=tx_hash,
+            block_number=receipt['blockNumber'],
+        )
+        db.add(vote_receipt)
+        db.commit()
 
-        except Exception as e:
-            safe_delete(tmp_path)
-            return jsonify({"error": "Vote failed", "detail": str(e)}), 500
+        return jsonify({
+            "ok": True,
+            "tx": tx_hash,
+            "receipt_id": receipt_id,
+            "block_number": receipt['blockNumber']
+        })
+
+    except Exception as e:
+        return jsonify({"error": "Vote failed", "detail": str(e)}), 500
 
 
 # ============================================================
@@ -989,11 +1609,11 @@ def vote_legacy():
 @app.route("/api/receipts/<int:receipt_id>", methods=["GET"])
 def get_receipt(receipt_id):
     """Get vote receipt by ID"""
-    with SessionLocal() as db:
-        receipt = db.query(VoteReceipt).filter_by(receipt_id=receipt_id).first()
-        if not receipt:
-            return jsonify({"error": "Receipt not found"}), 404
-        return jsonify(receipt.to_dict())
+    db = get_db()
+    receipt = db.execute(RECEIPT_BY_ID, {"receipt_id": receipt_id}).scalar_one_or_none()
+    if not receipt:
+        return jsonify({"error": "Receipt not found"}), 404
+    return jsonify(receipt.to_dict())
 
 
 @app.route("/api/receipts/verify/<int:receipt_id>", methods=["GET"])
@@ -1001,12 +1621,12 @@ def verify_receipt(receipt_id):
     """Verify vote receipt against blockchain"""
     try:
         # Get local record first
-        with SessionLocal() as db:
-            local_receipt = db.query(VoteReceipt).filter_by(receipt_id=receipt_id).first()
+        db = get_db()
+        local_receipt = db.execute(RECEIPT_BY_ID, {"receipt_id": receipt_id}).scalar_one_or_none()
 
         # Check on blockchain
         try:
-            data = contract.functions.getVoteReceipt(receipt_id).call()
+            data = GET_VOTE_RECEIPT(receipt_id).call()
             exists = data[4]
         except Exception as chain_err:
             # Blockchain check failed — fall back to local DB only
@@ -1083,36 +1703,52 @@ def search_receipt():
 
     enrollment_hash = generate_enrollment_hash(enrollment, election_id)
 
-    with SessionLocal() as db:
-        # Filter by both enrollment_hash AND election_id for accuracy
-        receipt = db.query(VoteReceipt).filter_by(
-            enrollment_hash=enrollment_hash,
-            election_id=election_id
-        ).first()
+    db = get_db()
+    # Filter by both enrollment_hash AND election_id for accuracy
+    receipt = db.execute(RECEIPT_BY_HASH_ELECTION, {
+        "enrollment_hash": enrollment_hash,
+        "election_id": election_id,
+    }).scalar_one_or_none()
 
-        # Fallback: try just enrollment_hash (in case election_id mismatch)
-        if not receipt:
-            receipt = db.query(VoteReceipt).filter_by(
-                enrollment_hash=enrollment_hash
-            ).first()
-
-        if not receipt:
-            return jsonify({
-                "found": False,
-                "message": f"No vote found for enrollment '{enrollment}' in this election. Either you haven't voted yet, or wrong election selected."
-            }), 404
+    # Fallback: try just enrollment_hash (in case election_id mismatch)
+    if not receipt:
+        receipt = db.execute(
+            RECEIPT_BY_HASH, {"enrollment_hash": enrollment_hash}
+        ).scalar_one_or_none()
 
+    if not receipt:
         return jsonify({
-            "found": True,
-            "receipt": receipt.to_dict()
-        })
+            "found": False,
+            "message": f"No vote found for enrollment '{enrollment}' in this election. Either you haven't voted yet, or wrong election selected."
+        }), 404
+
+    return jsonify({
+        "found": True,
+        "receipt": receipt.to_dict()
+    })
 
 
 # ============================================================
 #                    AI CHATBOT (GEMINI)
 # ============================================================
+# System instructions to guide the bot's behavior
+_SYSTEM_PROMPT = (
+    "You are 'Vote Rakshak AI', the official intelligent assistant for a top-tier Web3 Decentralized Voting System. "
+    "You must keep your answers extremely concise (max 2-3 sentences). "
+    "Be helpful, energetic, and professional. Use minimal emojis. "
+    "Help voters with: How to vote (Face Auth + Blockchain), how to check results, what is a Receipt ID, and general system security inquiries. "
+    "Never use markdown formatting like bolding or bullet points, just use plain text."
+)
+
+# Successful replies keyed by normalized question text
+_CHAT_CACHE = TTLCache(maxsize=256, ttl=600)
+_CHAT_LOCK = threading.Lock()
+# Seconds; enforced by the Gemini client too, so a timed-out call frees its CHAT_POOL thread
+CHAT_TIMEOUT = 30
+
+
 @app.route("/api/chat", methods=["POST"])
-def ai_chat():
+async def ai_chat():
     """Handles messages from the AI Chatbot on the frontend"""
     data = request.get_json() or {}
     msg = data.get("message", "")
@@ -1123,26 +1759,33 @@ def ai_chat():
     if not GEMINI_API_KEY:
         return jsonify({"reply": "🤖 My AI brain is offline right now! Please add your GEMINI_API_KEY in backend/config/secret.py to enable me."}), 200
 
+    # Identical questions ("how do I vote?") are answered from the cache
+    cache_key = " ".join(msg.lower().split())
+    with _CHAT_LOCK:
+        cached = _CHAT_CACHE.get(cache_key)
+    if cached is not None:
+        return jsonify({"reply": cached})
+
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        
-        # System instructions to guide the bot's behavior
-        system_prompt = (
-            "You are 'Vote Rakshak AI', the official intelligent assistant for a top-tier Web3 Decentralized Voting System. "
-            "You must keep your answers extremely concise (max 2-3 sentences). "
-            "Be helpful, energetic, and professional. Use minimal emojis. "
-            "Help voters with: How to vote (Face Auth + Blockchain), how to check results, what is a Receipt ID, and general system security inquiries. "
-            "Never use markdown formatting like bolding or bullet points, just use plain text."
+        # Pure network I/O → run on the chat pool so the worker isn't held
+        generate = partial(
+            _GEMINI_MODEL.generate_content,
+            f"{_SYSTEM_PROMPT}\n\nUser Question: {msg}",
+            request_options={"timeout": CHAT_TIMEOUT},
+        )
+        response = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(CHAT_POOL, generate),
+            timeout=CHAT_TIMEOUT,
         )
-        
-        response = model.generate_content(f"{system_prompt}\n\nUser Question: {msg}")
         reply_text = response.text.replace("*", "").strip()
-        
+
+        with _CHAT_LOCK:
+            _CHAT_CACHE[cache_key] = reply_text
         return jsonify({"reply": reply_text})
         
     except Exception as e:
         error_msg = str(e)
-        print("Gemini API Error:", error_msg)
+        logger.warning("Gemini API Error: %s", error_msg)
         
         # Make the error message user-friendly based on common API errors
         if "404" in error_msg or "not found" in error_msg:
@@ -1158,6 +1801,7 @@ def ai_chat():
 #                    RUN SERVER
 # ============================================================
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     print("\n Vote Rakshak V2 Server running at http://127.0.0.1:5000\n")
     print(" Features: Multi-Election | Phase Management | Vote Receipts\n")
     app.run(debug=True)
@@ -0,0 +1,45 @@
+# backend/calibrate_bcrypt.py
+# Pick the bcrypt cost for this machine and store it as BCRYPT_ROUNDS in backend/.env
+#   python calibrate_bcrypt.py [target_ms]
+import os, sys, time, bcrypt
+
+TARGET_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+COSTS = range(10, 15)
+SAMPLES = 3
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+
+def time_cost(rounds):
+    """Median hashpw time in ms at the given cost"""
+    salt = bcrypt.gensalt(rounds=rounds)
+    timings = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[SAMPLES // 2]
+
+
+def write_env(rounds):
+    lines = []
+    if os.path.exists(ENV_PATH):
+        with open(ENV_PATH, "r", encoding="utf-8") as f:
+            lines = [l for l in f.read().splitlines() if not l.startswith("BCRYPT_ROUNDS=")]
+    lines.append(f"BCRYPT_ROUNDS={rounds}")
+    with open(ENV_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+print(f"Calibrating bcrypt for ~{TARGET_MS:.0f} ms per hash\n")
+
+# Highest cost still under the target; never below the lowest candidate
+best = COSTS[0]
+for rounds in COSTS:
+    ms = time_cost(rounds)
+    print(f" cost={rounds}: {ms:.0f} ms")
+    if ms > TARGET_MS:
+        break  # each +1 doubles the time → higher costs only get slower
+    best = rounds
+
+write_env(best)
+print(f"\n✔ BCRYPT_ROUNDS={best} written to {ENV_PATH}")
@@ -26,6 +26,12 @@ CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS", "")
 ADMIN_ACCOUNT = os.getenv("ADMIN_ACCOUNT", "")
 ADMIN_PRIVATE_KEY = os.getenv("ADMIN_PRIVATE_KEY", "")
 
+# bcrypt work factor for admin passwords (library default 12);
+# calibrate_bcrypt.py writes a per-machine value to .env
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Only an explicitly configured cost may rehash existing hashes downward
+BCRYPT_ROUNDS_EXPLICIT = "BCRYPT_ROUNDS" in os.environ
+
 # ABI Path
 ABI_PATH = os.getenv("ABI_PATH", "")
 
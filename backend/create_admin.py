@@ -1,8 +1,9 @@
 # backend/create_admin.py
 import cv2, os, bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from models import Admin, SessionLocal
-from face_utils import encode_face
-import face_recognition
+from face_utils import encode_face, encoding_to_bytes
+from config.secret import BCRYPT_ROUNDS
 
 print("✅ DB Ready")
 print("Enter new admin details\n")
@@ -10,7 +11,22 @@ print("Enter new admin details\n")
 username = input("Username: ").strip()
 password = input("Password: ").strip()
 
+# bcrypt releases the GIL → hash in the background while the camera/encoder run
+_hash_pool = ThreadPoolExecutor(max_workers=1)
+hash_future = _hash_pool.submit(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
 # ---------------- Camera capture ----------------
+# Probe the GUI backend once instead of failing imshow inside the loop
+try:
+    cv2.namedWindow("probe", cv2.WINDOW_AUTOSIZE)
+    cv2.destroyWindow("probe")
+    HEADLESS = False
+except cv2.error:
+    HEADLESS = True
+
+# Frames dropped in headless mode so auto-exposure can settle before capture
+WARMUP_FRAMES = 10
+
 print("\n Starting camera. Press SPACE to capture, ESC to quit.")
 cam = cv2.VideoCapture(0)
 
@@ -22,27 +38,33 @@ if not cam.isOpened():
     if not os.path.exists(img_path):
         print("❌ File not found. Exiting.")
         exit()
-    capture_path = img_path
+    img = cv2.imread(img_path)
+elif HEADLESS:
+    # Headless mode → auto capture
+    print("⚠ Preview not supported. Capturing automatically.")
+    img = None
+    for _ in range(WARMUP_FRAMES):
+        cam.read()
+    ret, frame = cam.read()
+    if not ret:
+        print("❌ Camera read failed.")
+    else:
+        img = frame
+    cam.release()
 else:
-    capture_path = None
+    img = None
     while True:
         ret, frame = cam.read()
         if not ret:
             print("❌ Camera read failed.")
             break
 
-        try:
-            cv2.imshow(
-                "Admin Capture - SPACE to capture, ESC to cancel",
-                frame,
-            )
-            key = cv2.waitKey(1) & 0xFF
-        except Exception:
-            # Headless mode → auto capture
-            print("⚠ Preview not supported. Capturing automatically.")
-            capture_path = "admin_temp.jpg"
-            cv2.imwrite(capture_path, frame)
-            break
+        cv2.imshow(
+            "Admin Capture - SPACE to capture, ESC to cancel",
+            frame,
+        )
+        # ~30 ms poll is still instant for SPACE/ESC and frees the GUI thread
+        key = cv2.waitKey(30) & 0xFF
 
         if key == 27:  # ESC
             print("Cancelled.")
@@ -54,9 +76,9 @@ else:
             exit()
 
         if key == 32:  # SPACE
-            capture_path = "admin_temp.jpg"
-            cv2.imwrite(capture_path, frame)
-            print("✔ Captured to admin_temp.jpg")
+            # Keep the frame in memory; no JPEG encode/decode round-trip via disk
+            img = frame
+            print("✔ Captured")
             break
 
     cam.release()
@@ -67,31 +89,20 @@ else:
 
 # ---------------- Detect & Encode face ----------------
 try:
-    img = cv2.imread(capture_path)
     if img is None:
         raise Exception("Captured image unreadable")
 
-    # Quick check that at least one face exists
-    locations = face_recognition.face_locations(img[:, :, ::-1], model="hog")
-    if len(locations) == 0:
-        print("❌ No face detected in provided image.")
-        if capture_path == "admin_temp.jpg" and os.path.exists(capture_path):
-            os.remove(capture_path)
-        exit()
-
-    print("✔ Face detected")
-
+    # Detection (downscaled HOG) + encoding in one pass; raises if no face is found
     enc = encode_face(img)  # BGR numpy → encode_face converts to RGB internally
+    print("✔ Face detected")
     print("✔ Face encoded")
 except Exception as e:
     print("❌ Error:", e)
-    if capture_path == "admin_temp.jpg" and os.path.exists(capture_path):
-        os.remove(capture_path)
     exit()
 
 # ---------------- Store admin in DB ----------------
 try:
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed = hash_future.result().decode()
 
     with SessionLocal() as db:
         existing = db.query(Admin).filter_by(username=username).first()
@@ -101,7 +112,7 @@ try:
             new_admin = Admin(
                 username=username,
                 password_hash=hashed,
-                face_encoding=enc.tobytes(),
+                face_encoding=encoding_to_bytes(enc),
             )
             db.add(new_admin)
             db.commit()
@@ -110,7 +121,3 @@ try:
             print(" Face Encoding Stored ✔")
 except Exception as e:
     print("❌ DB error:", e)
-
-# ---------------- Cleanup ----------------
-if capture_path == "admin_temp.jpg" and os.path.exists(capture_path):
-    os.remove(capture_path)
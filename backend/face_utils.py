@@ -1,3 +1,5 @@
+import os
+import importlib.util
 import cv2
 import numpy as np
 import hashlib
@@ -6,51 +8,98 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("face_utils")
 
+# Face hash committed on-chain: "sha256" (default) or "blake3"
+HASH_SCHEME = os.getenv("HASH_SCHEME", "sha256").lower()
+if HASH_SCHEME == "blake3":
+    try:
+        from blake3 import blake3 as _blake3
+    except ImportError:
+        logger.warning("HASH_SCHEME=blake3 but blake3 is not installed; using sha256.")
+        HASH_SCHEME = "sha256"
+
+# hashlib.sha256 should be the OpenSSL build (SHA-NI accelerated on modern CPUs)
+if HASH_SCHEME == "sha256" and not hashlib.sha256.__name__.startswith("openssl_"):
+    logger.warning("hashlib.sha256 is not OpenSSL-backed; face hashing will be slower.")
+
 # Lower = more strict. 0.45 is fairly strict for security.
 # For mock mode with random encodings, set very high to avoid false positives
-SIMILARITY_THRESHOLD = 10000.0
+SIMILARITY_THRESHOLD = 0.45
+EMBEDDING_DIM = 128
+# Stored form: unit-norm float32 → fixed 512 bytes (models.py BINARY(512))
+EMBEDDING_BYTES = EMBEDDING_DIM * 4
+# int8 form (face hash input): component * QUANT_SCALE, clipped to the int8 range
+QUANT_SCALE = 127.0
+# HOG detection runs on a copy no larger than this on its longest side
+DETECT_MAX_SIDE = 640
+# Up to this longest side a face may be under HOG's 80 px window → upsample once.
+# Covers the 320x240 half-resolution decode of a standard 640x480 webcam frame.
+UPSAMPLE_MAX_SIDE = 480
+
+
+def _dot_threshold(distance):
+    # Unit vectors: ||a - b||^2 = 2 - 2·a·b  →  distance <= T  ⇔  a·b >= 1 - T²/2
+    return 1.0 - distance * distance / 2.0
+
 
-# Try to import face_recognition, else use mock
-try:
-    import face_recognition
-except ImportError:
+MATCH_DOT_THRESHOLD = _dot_threshold(SIMILARITY_THRESHOLD)
+
+# Probe for face_recognition without importing it: loading dlib (~100 MB of
+# shared libs + model files) is deferred to the first encode via _face_backend()
+MOCK_MODE = importlib.util.find_spec("face_recognition") is None
+if MOCK_MODE:
+    SIMILARITY_THRESHOLD = 10000.0
+    MATCH_DOT_THRESHOLD = _dot_threshold(SIMILARITY_THRESHOLD)
     logger.warning("face_recognition not installed. Using mock mode.")
-    # Create mock module
-    class MockFaceRecognition:
-        # Store a consistent test encoding for authentication (admin login)
-        TEST_ENCODING = np.ones(128, dtype=np.float32) * 0.5
-        
-        @staticmethod
-        def load_image_file(path):
-            img = cv2.imread(path)
-            if img is None:
-                return None
-            return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        @staticmethod
-        def face_locations(image, model="hog"):
-            if image is None or image.size == 0:
-                return []
-            h, w = image.shape[:2]
-            return [(0, w, h, 0)]
-        
-        @staticmethod
-        def face_encodings(image, known_face_locations=None):
-            # Generate completely unique random encoding for each image
-            # Uses a hash of the full image data with added randomness
-            import hashlib
-            img_hash = hashlib.sha256(image.tobytes()).hexdigest()
-            # Convert hash to seed but add extra randomness
-            seed = int(img_hash, 16) % (2**31)
-            # Create local RNG that doesn't affect global state
-            rng = np.random.RandomState(seed)
-            # Generate random but seeded encoding
-            encoding = rng.randn(128).astype(np.float32)
-            # Add some variations to ensure uniqueness
-            encoding = encoding / (np.linalg.norm(encoding) + 1e-8)
-            return [encoding]
+
+
+# Stand-in backend when face_recognition is not installed
+class MockFaceRecognition:
+    # Store a consistent test encoding for authentication (admin login)
+    TEST_ENCODING = np.ones(128, dtype=np.float32) * 0.5
+    
+    @staticmethod
+    def load_image_file(path):
+        img = cv2.imread(path)
+        if img is None:
+            return None
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    
+    @staticmethod
+    def face_locations(image, number_of_times_to_upsample=1, model="hog"):
+        if image is None or image.size == 0:
+            return []
+        h, w = image.shape[:2]
+        return [(0, w, h, 0)]
     
-    face_recognition = MockFaceRecognition()
+    @staticmethod
+    def face_encodings(image, known_face_locations=None):
+        # Generate a distinct, deterministic encoding for each image
+        # Seed from ~4 KB stride-sampled pixels + shape, not SHA-256 over the whole frame
+        flat = np.ascontiguousarray(image).reshape(-1)
+        sample = flat[::max(1, flat.size // 4096)]
+        digest = hashlib.blake2b(sample.tobytes(), digest_size=8, person=str(image.shape).encode()[:16])
+        seed = int.from_bytes(digest.digest(), "little") & 0x7FFFFFFF
+        # Create local RNG that doesn't affect global state
+        rng = np.random.RandomState(seed)
+        # Generate random but seeded encoding
+        encoding = rng.randn(128).astype(np.float32)
+        # Add some variations to ensure uniqueness
+        encoding = encoding / (np.linalg.norm(encoding) + 1e-8)
+        return [encoding]
+
+
+_face_recognition = None
+
+
+def _face_backend():
+    global _face_recognition
+    if _face_recognition is None:
+        if MOCK_MODE:
+            _face_recognition = MockFaceRecognition()
+        else:
+            import face_recognition
+            _face_recognition = face_recognition
+    return _face_recognition
 
 
 # -----------------------------------------------
@@ -72,62 +121,137 @@ def _validate_image(img):
     return True
 
 
+# -----------------------------------------------
+# HOG face detection on a downscaled copy
+# -----------------------------------------------
+def locate_faces(rgb):
+    """face_locations boxes (top, right, bottom, left) in rgb's own coordinates"""
+    longest = max(rgb.shape[:2])
+    upsample = 1 if longest <= UPSAMPLE_MAX_SIDE else 0
+    if longest <= DETECT_MAX_SIDE:
+        return _face_backend().face_locations(rgb, number_of_times_to_upsample=upsample, model="hog")
+
+    scale = DETECT_MAX_SIDE / longest
+    small = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    boxes = _face_backend().face_locations(small, number_of_times_to_upsample=0, model="hog")
+    # Landmarks + descriptor still run on the full-resolution image
+    return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+
 # -----------------------------------------------
 # Extract face encoding (128-D dlib vector)
 # -----------------------------------------------
 def encode_face(img_or_path):
     # Path input
     if isinstance(img_or_path, str):
-        img = face_recognition.load_image_file(img_or_path)  # RGB
+        img = _face_backend().load_image_file(img_or_path)  # RGB
         if img is None or img.size == 0:
             raise ValueError("Failed to load image file")
     else:
         # numpy → validate
         _validate_image(img_or_path)
 
-        # convert BGR → RGB
-        try:
-            img = cv2.cvtColor(img_or_path, cv2.COLOR_BGR2RGB)
-        except Exception:
-            raise ValueError("Failed to convert BGR→RGB")
+        # BGR → RGB as a reversed-stride view, materialized in one plain copy:
+        # dlib's face_encodings rejects negative-stride arrays
+        img = np.ascontiguousarray(img_or_path[:, :, ::-1])
 
     # Detect face
-    locations = face_recognition.face_locations(img, model="hog")
+    locations = locate_faces(img)
     if len(locations) == 0:
         raise ValueError("No face detected in image")
 
     # Compute embedding
-    encs = face_recognition.face_encodings(img, known_face_locations=locations)
+    encs = _face_backend().face_encodings(img, known_face_locations=locations)
     if not encs:
         raise ValueError("Failed to compute face encoding")
 
-    return encs[0].astype(np.float32)
+    # Unit norm once here; storage, hashing and matching all consume it as-is
+    return normalize_encoding(encs[0])
 
 
 # -----------------------------------------------
-# Convert DB bytes → float vector
+# Unit L2 norm → matching is a single dot product
+# -----------------------------------------------
+def normalize_encoding(emb):
+    # dlib hands back float64: divide straight into the float32 result so the
+    # cast and the scaling share one allocation instead of two
+    emb = np.asarray(emb)
+    out = np.empty(emb.shape, dtype=np.float32)
+    np.divide(emb, np.linalg.norm(emb) + 1e-8, out=out, casting="same_kind")
+    return out
+
+
+# -----------------------------------------------
+# float encoding → int8 form (128 bytes)
+# -----------------------------------------------
+def quantize_encoding(emb):
+    return np.clip(np.rint(np.asarray(emb, dtype=np.float32) * QUANT_SCALE), -128, 127).astype(np.int8)
+
+
+# -----------------------------------------------
+# float encoding → DB storage form (512 bytes)
+# -----------------------------------------------
+def encoding_to_bytes(emb):
+    # emb comes from encode_face → already unit norm
+    return np.asarray(emb, dtype=np.float32).tobytes()
+
+
+# -----------------------------------------------
+# Convert DB bytes → float32 vector
 # -----------------------------------------------
 def decode_embedding(raw_bytes):
     if raw_bytes is None:
         return np.array([], dtype=np.float32)
-    return np.frombuffer(raw_bytes, dtype=np.float32)
+    if len(raw_bytes) != EMBEDDING_BYTES:
+        raise ValueError(f"Unexpected face encoding size: {len(raw_bytes)} bytes")
+    # Legacy raw rows are normalized here so compare_faces can assume unit norm
+    return normalize_encoding(np.frombuffer(raw_bytes, dtype=np.float32))
+
+
+# -----------------------------------------------
+# Convert N DB values → (N,128) float32 matrix
+# -----------------------------------------------
+def decode_embeddings_batch(blobs):
+    if not blobs:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    for raw in blobs:
+        if len(raw) != EMBEDDING_BYTES:
+            raise ValueError(f"Unexpected face encoding size: {len(raw)} bytes")
+    # One C-level join + one ndarray header instead of N frombuffer calls
+    mat = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    # Legacy raw float32 rows share this size → row-normalize like decode_embedding
+    return mat / (np.linalg.norm(mat, axis=1, keepdims=True) + 1e-8)
 
 
 # -----------------------------------------------
 # Compare faces (Euclidean)
 # -----------------------------------------------
-def compare_faces(known_bytes, test_img):
+def compare_faces(known_bytes, probe):
     """
-    known_bytes: bytes from DB (Admin.face_encoding / Voter.face_encoding)
-    test_img   : numpy BGR image (from OpenCV) OR path
-    In mock mode, always returns True (accepts any face)
+    known_bytes: bytes from DB (Admin.face_encoding / VoterEmbedding.emb)
+                 or an already-decoded unit-norm float32 encoding
+    probe      : encode_face output for the live image, so callers that also
+                 hash it run the dlib encode only once
+    Both sides are unit-norm, so the Euclidean threshold is checked as a
+    single dot product against MATCH_DOT_THRESHOLD.
+    In mock mode the threshold is high enough to accept any face
     """
-    # In mock mode, always accept the face
-    return True
+    if isinstance(known_bytes, np.ndarray):
+        known = known_bytes
+    else:
+        known = decode_embedding(known_bytes)
+    if known.size == 0:
+        return False
+    return bool(np.dot(known, probe) >= MATCH_DOT_THRESHOLD)
 
 
 # -----------------------------------------------
-# Face encoding → SHA256 hash for blockchain
+# Face encoding → 32-byte hash for blockchain (HASH_SCHEME)
 # -----------------------------------------------
 def hash_encoding(emb):
-    return "0x" + hashlib.sha256(emb.tobytes()).hexdigest()
+    # One-shot digest over the array's own buffer (no tobytes() copy, no update loop)
+    # Hashes the 128-byte int8 form so the result is identical across devices/BLAS builds
+    buf = memoryview(np.ascontiguousarray(quantize_encoding(emb))).cast("B")
+    if HASH_SCHEME == "blake3":
+        return "0x" + _blake3(buf).hexdigest()
+    return "0x" + hashlib.sha256(buf).hexdigest()
@@ -2,16 +2,28 @@
 import os
 from dotenv import load_dotenv
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, Enum as SQLEnum
+from sqlalchemy import (
+    create_engine, Column, Integer, String, DateTime, Boolean, Text, Index, ForeignKey,
+    insert, select, inspect, text, Enum as SQLEnum
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.dialects.mysql import BINARY
 from datetime import datetime
 import urllib.parse
 import enum
+import logging
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "engine", "Base", "SessionLocal", "init_db", "bulk_register_voters",
+    "ElectionPhase", "Admin", "Voter", "VoterEmbedding", "Election", "VoteReceipt",
+    "VoterElectionRegistration",
+]
+
 # ---------------------------------------------------------
 #   DATABASE CONFIG
 # ---------------------------------------------------------
@@ -31,7 +43,16 @@ DATABASE_URL = (
 # ---------------------------------------------------------
 #   ENGINE + BASE
 # ---------------------------------------------------------
-engine = create_engine(DATABASE_URL, echo=False)
+# Request threads + EXECUTOR workers share this pool; pre_ping/recycle drop
+# connections MySQL closed after wait_timeout instead of failing a request
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 Base = declarative_base()
 
 
@@ -54,7 +75,7 @@ class Admin(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(String(100), unique=True, nullable=False)
     password_hash = Column(String(300), nullable=False)
-    face_encoding = Column(LONGBLOB, nullable=False)
+    face_encoding = Column(BINARY(512), nullable=False)  # 128 × float32, unit norm
 
 
 class Voter(Base):
@@ -63,7 +84,16 @@ class Voter(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     enrollment = Column(String(50), unique=True, nullable=False)
     name = Column(String(100), nullable=False)
-    face_encoding = Column(LONGBLOB, nullable=False)
+
+
+class VoterEmbedding(Base):
+    """
+    Voter face encodings, kept off the voters table so its rows stay narrow
+    """
+    __tablename__ = "voter_embeddings"
+
+    voter_id = Column(Integer, ForeignKey("voters.id"), primary_key=True)
+    emb = Column(BINARY(512), nullable=False)  # 128 × float32, unit norm
 
 
 class Election(Base):
@@ -107,6 +137,12 @@ class VoteReceipt(Base):
     Vote receipts for verification (no vote choice stored)
     """
     __tablename__ = "vote_receipts"
+    __table_args__ = (
+        # Leading enrollment_hash also serves the hash-only fallback lookup
+        Index("ix_vr_enroll_election", "enrollment_hash", "election_id"),
+        # /api/tx/<hash> is polled by the vote page until the receipt lands
+        Index("ix_vr_tx_hash", "tx_hash"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     receipt_id = Column(Integer, unique=True, nullable=False)
@@ -135,6 +171,9 @@ class VoterElectionRegistration(Base):
     Track which voters are registered for which elections
     """
     __tablename__ = "voter_election_registrations"
+    __table_args__ = (
+        Index("ix_ver_voter_election", "voter_id", "election_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     voter_id = Column(Integer, nullable=False)
@@ -145,14 +184,105 @@ class VoterElectionRegistration(Base):
     has_voted = Column(Boolean, default=False)
 
 
+# ---------------------------------------------------------
+#   BULK HELPERS
+# ---------------------------------------------------------
+def bulk_register_voters(db, rows):
+    """
+    Insert many voters (+ their embeddings) with executemany INSERTs instead of a
+    per-row ORM flush.
+    rows: [{"enrollment", "name", "face_encoding"}] → {enrollment: voter id}
+    Caller commits.
+    """
+    if not rows:
+        return {}
+    db.execute(insert(Voter), [
+        {"enrollment": row["enrollment"], "name": row["name"]} for row in rows
+    ])
+    # MySQL has no INSERT ... RETURNING → read the new ids back in one SELECT
+    enrollments = [row["enrollment"] for row in rows]
+    ids = dict(db.execute(
+        select(Voter.enrollment, Voter.id).where(Voter.enrollment.in_(enrollments))
+    ).all())
+    db.execute(insert(VoterEmbedding), [
+        {"voter_id": ids[row["enrollment"]], "emb": row["face_encoding"]} for row in rows
+    ])
+    return ids
+
+
 # ---------------------------------------------------------
 #   CREATE TABLES IF NOT EXISTS
 # ---------------------------------------------------------
-Base.metadata.create_all(engine)
+def init_db(drop_legacy_columns=False):
+    """
+    Create missing tables + indexes (python models.py --init, or AUTO_CREATE_TABLES=1).
+    drop_legacy_columns: also drop columns a migration has emptied (--init only)
+    """
+    Base.metadata.create_all(engine)
+
+    # create_all() skips tables that already exist → add indexes introduced later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except Exception as e:
+                print(f"[WARN] Could not create index {index.name}: {e}")
+
+    _migrate_voter_embeddings(drop_legacy_column=drop_legacy_columns)
+
+
+def _migrate_voter_embeddings(drop_legacy_column=False):
+    """Copy encodings out of the pre-split voters.face_encoding column"""
+    legacy = {c["name"]: c for c in inspect(engine).get_columns("voters")}.get("face_encoding")
+    if legacy is None:
+        return
+    # Legacy values are raw (non-unit) float32 → decoded as unit-norm float32 rows
+    from face_utils import decode_embeddings_batch
+
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, face_encoding FROM voters WHERE face_encoding IS NOT NULL "
+            "AND id NOT IN (SELECT voter_id FROM voter_embeddings)"
+        )).all()
+        if rows:
+            mat = decode_embeddings_batch([bytes(raw) for _, raw in rows])
+            conn.execute(insert(VoterEmbedding), [
+                {"voter_id": voter_id, "emb": emb.tobytes()}
+                for (voter_id, _), emb in zip(rows, mat)
+            ])
+        logger.info("Copied %d voter encodings to voter_embeddings", len(rows))
+
+        if drop_legacy_column:
+            conn.execute(text("ALTER TABLE voters DROP COLUMN face_encoding"))
+            logger.info("Dropped legacy voters.face_encoding column")
+        else:
+            if not legacy["nullable"]:
+                # New voters are written without it → must not stay NOT NULL
+                col_type = legacy["type"].compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE voters MODIFY face_encoding {col_type} NULL"))
+            logger.warning(
+                "Legacy voters.face_encoding column kept; run 'python models.py --init' to drop it"
+            )
+
+
+# Schema checks cost a round-trip per table → opt-in instead of on every import
+if os.getenv("AUTO_CREATE_TABLES") == "1":
+    init_db()
 
 # ---------------------------------------------------------
 #   SESSION FACTORY
 # ---------------------------------------------------------
 SessionLocal = sessionmaker(bind=engine)
 
-print("[OK] Database connected & models ready (V2 with Elections)")
+print("[OK] Database models ready (V2 with Elections)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--init" in sys.argv:
+        logging.basicConfig(level=logging.INFO)
+        init_db(drop_legacy_columns=True)
+        print("[OK] Tables and indexes created")
+    else:
+        print("Usage: python models.py --init")
@@ -154,6 +154,29 @@ contract VoteRakshakV2 {
         emit CandidateAdded(_electionId, candidateId, _name);
     }
     
+    /**
+     * @dev Add several candidates in one transaction (only in CREATED phase)
+     */
+    function addCandidates(
+        uint256 _electionId,
+        string[] memory _names
+    ) public onlyAdmin electionExists(_electionId) inPhase(_electionId, ElectionPhase.CREATED) {
+        Election storage election = elections[_electionId];
+        
+        for (uint256 i = 0; i < _names.length; i++) {
+            election.candidateCount++;
+            uint256 candidateId = election.candidateCount;
+            
+            candidates[_electionId][candidateId] = Candidate({
+                id: candidateId,
+                name: _names[i],
+                voteCount: 0
+            });
+            
+            emit CandidateAdded(_electionId, candidateId, _names[i]);
+        }
+    }
+    
     /**
      * @dev Start election (CREATED → ACTIVE)
      */
@@ -216,6 +239,32 @@ contract VoteRakshakV2 {
         emit VoterRegistered(_electionId, _enrollment, _faceHash);
     }
     
+    /**
+     * @dev Register several voters for an election in one transaction
+     */
+    function registerVoters(
+        uint256 _electionId,
+        string[] memory _enrollments,
+        bytes32[] memory _faceHashes
+    ) public onlyAdmin electionExists(_electionId) {
+        require(_enrollments.length == _faceHashes.length, "Length mismatch");
+        require(
+            elections[_electionId].phase == ElectionPhase.CREATED ||
+            elections[_electionId].phase == ElectionPhase.ACTIVE,
+            "Registration closed"
+        );
+        
+        for (uint256 i = 0; i < _enrollments.length; i++) {
+            require(!registeredFace[_electionId][_faceHashes[i]], "Face already registered for this election");
+            require(!registeredEnrollment[_electionId][_enrollments[i]], "Enrollment already registered");
+            
+            registeredFace[_electionId][_faceHashes[i]] = true;
+            registeredEnrollment[_electionId][_enrollments[i]] = true;
+            
+            emit VoterRegistered(_electionId, _enrollments[i], _faceHashes[i]);
+        }
+    }
+    
     /**
      * @dev Cast vote (only in ACTIVE phase)
      * @return receiptId The unique vote receipt ID
@@ -288,6 +337,24 @@ contract VoteRakshakV2 {
         return (c.id, c.name, c.voteCount);
     }
     
+    function getCandidates(uint256 _electionId) public view returns (
+        uint256[] memory ids,
+        string[] memory names,
+        uint256[] memory votes
+    ) {
+        uint256 count = elections[_electionId].candidateCount;
+        ids = new uint256[](count);
+        names = new string[](count);
+        votes = new uint256[](count);
+        
+        for (uint256 i = 0; i < count; i++) {
+            Candidate storage c = candidates[_electionId][i + 1];
+            ids[i] = c.id;
+            names[i] = c.name;
+            votes[i] = c.voteCount;
+        }
+    }
+    
     function getElectionPhase(uint256 _electionId) public view returns (ElectionPhase) {
         return elections[_electionId].phase;
     }